@@ -6,7 +6,7 @@ from tempfile import TemporaryDirectory
 from typing import Any, Union
 
 from .overlay import Overlay
-from .utils import sh, warn
+from .utils import cache_home, sh, warn
 
 
 class DisableKeyboardInterrupt:
@@ -28,27 +28,21 @@ class DisableKeyboardInterrupt:
 
 
 def create_cache_directory(name: str) -> Union[Path, "TemporaryDirectory[str]"]:
-    xdg_cache_raw = os.environ.get("XDG_CACHE_HOME")
-    if xdg_cache_raw is not None:
-        xdg_cache = Path(xdg_cache_raw)
-    else:
-        home = os.environ.get("HOME", None)
-        if home is None:
-            # we are in a temporary directory
-            return TemporaryDirectory()
-
-        xdg_cache = Path(home).joinpath(".cache")
+    cache = cache_home()
+    if cache is None:
+        # we are in a temporary directory
+        return TemporaryDirectory()
 
     counter = 0
     while True:
         try:
             final_name = name if counter == 0 else f"{name}-{counter}"
-            cache_home = xdg_cache.joinpath("nixpkgs-review", final_name)
-            cache_home.mkdir(parents=True)
+            cache_dir = cache.joinpath(final_name)
+            cache_dir.mkdir(parents=True)
         except FileExistsError:
             counter += 1
         else:
-            return cache_home
+            return cache_dir
 
 
 class Builddir:
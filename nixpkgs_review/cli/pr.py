@@ -19,14 +19,22 @@ if TYPE_CHECKING:
     from nixpkgs_review.nix import Attr
 
 
+PR_URL_PREFIX = "https://github.com/NixOS/nixpkgs/pull/"
+PR_RANGE_RE = re.compile(r"(\d+)-(\d+)")
+PR_URL_RE = re.compile(re.escape(PR_URL_PREFIX) + r"(\d+)/?.*")
+
+
 def parse_pr_numbers(number_args: list[str]) -> list[int]:
     prs: list[int] = []
     for arg in number_args:
-        m = re.match(r"(\d+)-(\d+)", arg)
+        if arg.isascii() and arg.isdigit():
+            prs.append(int(arg))
+            continue
+        m = PR_RANGE_RE.match(arg)
         if m:
             prs.extend(range(int(m.group(1)), int(m.group(2))))
         else:
-            m = re.match(r"https://github.com/NixOS/nixpkgs/pull/(\d+)/?.*", arg)
+            m = PR_URL_RE.match(arg) if arg.startswith(PR_URL_PREFIX) else None
             if m:
                 prs.append(int(m.group(1)))
             else:
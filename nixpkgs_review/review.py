@@ -1,6 +1,7 @@
 import argparse
 import concurrent.futures
 import os
+import shlex
 import subprocess
 import sys
 import tempfile
@@ -51,7 +52,7 @@ def print_packages(
     print()
 
 
-@dataclass
+@dataclass(slots=True)
 class Package:
     pname: str
     version: str
@@ -476,7 +477,7 @@ def _list_packages_system(
     ]
     if check_meta:
         cmd.append("--meta")
-    info("$ " + " ".join(cmd))
+    info("$ " + shlex.join(cmd))
     with tempfile.NamedTemporaryFile(mode="w") as tmp:
         res = subprocess.run(cmd, stdout=tmp, check=False)
         if res.returncode != 0:
@@ -641,14 +642,24 @@ def fetch_refs(repo: str, *refs: str) -> list[str]:
     if res.returncode != 0:
         msg = f"Failed to fetch {refs} from {repo}. git fetch failed with exit code {res.returncode}"
         raise NixpkgsReviewError(msg)
-    shas = []
-    for i, ref in enumerate(refs):
-        cmd = ["git", "rev-parse", "--verify", f"refs/nixpkgs-review/{i}"]
-        out = subprocess.run(cmd, text=True, stdout=subprocess.PIPE, check=False)
-        if out.returncode != 0:
-            msg = f"Failed to fetch {ref} from {repo} with command: {''.join(cmd)}"
+    # resolve all fetched refs with a single git process
+    cmd = ["git", "cat-file", "--batch-check=%(objectname)"]
+    out = subprocess.run(
+        cmd,
+        input="".join(f"refs/nixpkgs-review/{i}\n" for i in range(len(refs))),
+        text=True,
+        stdout=subprocess.PIPE,
+        check=False,
+    )
+    if out.returncode != 0:
+        msg = f"Failed to fetch {refs} from {repo} with command: {' '.join(cmd)}"
+        raise NixpkgsReviewError(msg)
+    shas = out.stdout.splitlines()
+    for ref, sha in zip(refs, shas, strict=True):
+        # cat-file reports unresolvable names as "<name> missing"
+        if sha.endswith(" missing"):
+            msg = f"Failed to fetch {ref} from {repo} with command: {' '.join(cmd)}"
             raise NixpkgsReviewError(msg)
-        shas.append(out.stdout.strip())
     return shas
 
 
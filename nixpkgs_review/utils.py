@@ -1,8 +1,10 @@
-import functools
+import json
+import os
 import shlex
 import shutil
 import subprocess
 import sys
+import time
 from collections.abc import Callable
 from pathlib import Path
 from typing import IO, Any
@@ -14,12 +16,20 @@ type System = str
 
 
 def color_text(code: int, file: IO[Any] | None = None) -> Callable[[str], None]:
-    def wrapper(text: str) -> None:
-        if HAS_TTY:
-            print(f"\x1b[{code}m{text}\x1b[0m", file=file)
-        else:
+    # decide once per printer, based on the stream it writes to
+    is_tty = HAS_TTY if file is None else file.isatty()
+    if not is_tty:
+
+        def plain(text: str) -> None:
             print(text, file=file)
 
+        return plain
+
+    prefix = f"\x1b[{code}m"
+
+    def wrapper(text: str) -> None:
+        print(prefix, text, "\x1b[0m", sep="", file=file)
+
     return wrapper
 
 
@@ -43,14 +53,102 @@ def verify_commit_hash(commit: str) -> str:
 
 
 def escape_attr(attr: str) -> str:
-    attr_parts = attr.split(".")
-    first = attr_parts[0]
-    rest = [f'"{item}"' for item in attr_parts[1:]]
-    return ".".join([first, *rest])
+    first, sep, rest = attr.partition(".")
+    if not sep:
+        return attr
+    return first + '."' + rest.replace(".", '"."') + '"'
+
+
+# Re-check builtins.currentSystem once a month even if nothing it depends on
+# appears to have changed.
+CURRENT_SYSTEM_CACHE_MAX_AGE = 30 * 24 * 60 * 60
+
+
+def cache_home() -> Path | None:
+    "Return the nixpkgs-review directory below $XDG_CACHE_HOME or ~/.cache"
+    xdg_cache_raw = os.environ.get("XDG_CACHE_HOME")
+    if xdg_cache_raw is not None:
+        xdg_cache = Path(xdg_cache_raw)
+    else:
+        home = os.environ.get("HOME", None)
+        if home is None:
+            return None
+        xdg_cache = Path(home).joinpath(".cache")
+    return xdg_cache.joinpath("nixpkgs-review")
+
+
+def current_system_cache() -> Path | None:
+    cache = cache_home()
+    return None if cache is None else cache.joinpath("current_system")
+
+
+def nix_conf_files() -> list[Path]:
+    "The nix.conf files nix reads, not counting files pulled in with `include`"
+    conf_dir = Path(os.environ.get("NIX_CONF_DIR", "/etc/nix"))
+    files = [conf_dir.joinpath("nix.conf")]
+    user_files = os.environ.get("NIX_USER_CONF_FILES")
+    if user_files is not None:
+        files.extend(Path(f) for f in user_files.split(":") if f)
+        return files
+
+    config_dirs = os.environ.get("XDG_CONFIG_DIRS") or "/etc/xdg"
+    files.extend(
+        Path(d).joinpath("nix", "nix.conf") for d in config_dirs.split(":") if d
+    )
+    xdg_config_raw = os.environ.get("XDG_CONFIG_HOME")
+    if xdg_config_raw is not None:
+        config_home = Path(xdg_config_raw)
+    else:
+        config_home = Path("~").expanduser().joinpath(".config")
+    files.append(config_home.joinpath("nix", "nix.conf"))
+    return files
+
+
+def current_system_cache_key() -> list[str]:
+    """
+    Everything builtins.currentSystem depends on: the machine (a cache
+    directory may be shared between hosts, or nix may run under Rosetta) and
+    the nix configuration, which can set `system`. Changes to files included
+    from nix.conf are not noticed, set NIXPKGS_REVIEW_CURRENT_SYSTEM if the
+    system comes from one of those.
+    """
+    uname = os.uname()
+    key = [uname.machine, uname.nodename, os.environ.get("NIX_CONFIG", "")]
+    for conf in nix_conf_files():
+        try:
+            mtime = str(conf.stat().st_mtime_ns)
+        except OSError:
+            mtime = ""
+        key.append(f"{conf}:{mtime}")
+    return key
+
+
+_current_system: str | None = None
 
 
-@functools.lru_cache(maxsize=1)
 def current_system() -> str:
+    global _current_system  # noqa: PLW0603
+    if _current_system is None:
+        _current_system = _compute_current_system()
+    return _current_system
+
+
+def _compute_current_system() -> str:
+    system_override = os.environ.get("NIXPKGS_REVIEW_CURRENT_SYSTEM")
+    if system_override:
+        return system_override
+
+    cache = current_system_cache()
+    key = current_system_cache_key() if cache is not None else []
+    if cache is not None:
+        try:
+            if time.time() - cache.stat().st_mtime < CURRENT_SYSTEM_CACHE_MAX_AGE:
+                cached = json.loads(cache.read_text())
+                if cached["key"] == key and cached["system"]:
+                    return str(cached["system"])
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
     system = subprocess.run(
         [
             "nix",
@@ -66,6 +164,13 @@ def current_system() -> str:
         stdout=subprocess.PIPE,
         text=True,
     )
+
+    if cache is not None:
+        try:
+            cache.parent.mkdir(parents=True, exist_ok=True)
+            cache.write_text(json.dumps({"key": key, "system": system.stdout}))
+        except OSError:
+            pass
     return system.stdout
 
 
@@ -1,6 +1,10 @@
+import atexit
+import contextlib
+import functools
 import json
 import os
 import shutil
+import socket
 import subprocess
 import sys
 import tempfile
@@ -24,11 +28,38 @@ class Nixpkgs:
     remote: Path
 
 
-def run(cmd: list[str | Path]) -> None:
-    subprocess.run(cmd, check=True)
+# Used instead of the user's and the system's git configuration. Also keeps
+# git from doing housekeeping work in the short-lived test repositories.
+GIT_CONFIG = """\
+[user]
+\tname = nixpkgs-review
+\temail = nixpkgs-review@example.com
+[gc]
+\tauto = 0
+[maintenance]
+\tauto = false
+"""
 
 
+requires_nom = pytest.mark.skipif(
+    shutil.which("nom") is None, reason="`nom` not found in PATH"
+)
+requires_bwrap = pytest.mark.skipif(
+    shutil.which("bwrap") is None, reason="`bwrap` not found in PATH"
+)
+
+
+def git(path: Path, *args: str | Path) -> None:
+    # captured, so git's hints and progress do not end up in the test output
+    subprocess.run(["git", "-C", path, *args], check=True, capture_output=True)
+
+
+@functools.cache
 def real_nixpkgs() -> str:
+    override = os.environ.get("TEST_NIXPKGS_PATH")
+    if override:
+        return override
+
     proc = subprocess.run(
         ["nix-instantiate", "--find-file", "nixpkgs"],
         stdout=subprocess.PIPE,
@@ -55,48 +86,48 @@ def real_nixpkgs() -> str:
     return proc.stdout.strip()
 
 
-def setup_nixpkgs(target: Path) -> Path:
+def tmpdir_root() -> str | None:
+    # e.g. NIXPKGS_REVIEW_TEST_TMPDIR=/dev/shm keeps test repositories in RAM
+    return os.environ.get("NIXPKGS_REVIEW_TEST_TMPDIR")
+
+
+@functools.cache
+def nixpkgs_template() -> Path:
+    # committed assets with the nixpkgs path filled in, prepared once per test process
+    template = Path(
+        tempfile.mkdtemp(prefix="nixpkgs-review-template-", dir=tmpdir_root())
+    )
+    atexit.register(shutil.rmtree, template, ignore_errors=True)
     shutil.copytree(
         Helpers.root().joinpath("assets/nixpkgs"),
-        target,
+        template,
         dirs_exist_ok=True,
     )
 
-    default_nix = target.joinpath("default.nix")
+    default_nix = template.joinpath("default.nix")
 
     text = default_nix.read_text().replace('"@NIXPKGS@"', real_nixpkgs())
     default_nix.write_text(text)
 
-    return target
-
+    # the checkout has no remote configured and the bare remote lives inside
+    # it, so copying the tree gives each test its own pair without running git
+    setup_git(template)
+    return template
 
-class Chdir:
-    def __init__(self, path: Path | str) -> None:
-        self.old_dir = Path.cwd()
-        self.new_dir = path
 
-    def __enter__(self) -> None:
-        os.chdir(self.new_dir)
+def setup_git(path: Path) -> None:
+    git(path, "init", "-b", "master")
+    git(path, "add", ".")
+    git(path, "commit", "-m", "first commit")
 
-    def __exit__(self, *args: object) -> None:
-        os.chdir(self.old_dir)
+    # cloning creates the bare remote with master in one step
+    git(path, "clone", "--bare", ".", "remote")
 
 
-def setup_git(path: Path) -> Nixpkgs:
-    os.environ["GIT_AUTHOR_NAME"] = "nixpkgs-review"
-    os.environ["GIT_AUTHOR_EMAIL"] = "nixpkgs-review@example.com"
-    os.environ["GIT_COMMITTER_NAME"] = "nixpkgs-review"
-    os.environ["GIT_COMMITTER_EMAIL"] = "nixpkgs-review@example.com"
-
-    run(["git", "-C", path, "init", "-b", "master"])
-    run(["git", "-C", path, "add", "."])
-    run(["git", "-C", path, "commit", "-m", "first commit"])
-
-    remote = path.joinpath("remote")
-    run(["git", "-C", path, "init", "--bare", str(remote)])
-    run(["git", "-C", path, "remote", "add", "origin", str(remote)])
-    run(["git", "-C", path, "push", "origin", "HEAD"])
-    return Nixpkgs(path=path, remote=remote)
+def setup_nixpkgs(target: Path) -> Nixpkgs:
+    # tests modify files in place, so they get real copies and not hardlinks
+    shutil.copytree(nixpkgs_template(), target, dirs_exist_ok=True)
+    return Nixpkgs(path=target, remote=target.joinpath("remote"))
 
 
 class Helpers:
@@ -105,8 +136,9 @@ class Helpers:
         return TEST_ROOT
 
     @staticmethod
-    def read_asset(asset: str) -> str:
-        return (TEST_ROOT / "assets" / asset).read_text()
+    @functools.cache
+    def read_asset(asset: str) -> bytes:
+        return (TEST_ROOT / "assets" / asset).read_bytes()
 
     @staticmethod
     def load_report(review_dir: str) -> dict[str, Any]:
@@ -118,6 +150,12 @@ class Helpers:
         report = Helpers.load_report(path)
         assert report["result"][current_system()]["built"] == [pkg_name]
 
+    @staticmethod
+    def git_commit_file(repo: Path, path: str, content: str, message: str) -> None:
+        # a single git call, committing only this already tracked file
+        repo.joinpath(path).write_text(content)
+        git(repo, "commit", "-m", message, "--", path)
+
     @staticmethod
     @contextmanager
     def save_environ() -> Iterator[None]:
@@ -129,16 +167,71 @@ class Helpers:
     @staticmethod
     @contextmanager
     def nixpkgs() -> Iterator[Nixpkgs]:
-        with Helpers.save_environ(), tempfile.TemporaryDirectory() as tmpdirname:
+        with (
+            Helpers.save_environ(),
+            tempfile.TemporaryDirectory(dir=tmpdir_root()) as tmpdirname,
+        ):
             path = Path(tmpdirname)
             nixpkgs_path = path.joinpath("nixpkgs")
             os.environ["XDG_CACHE_HOME"] = str(path.joinpath("cache"))
-            setup_nixpkgs(nixpkgs_path)
+            nixpkgs = setup_nixpkgs(nixpkgs_path)
+
+            # the review commands operate on the repository in the current directory
+            with contextlib.chdir(nixpkgs_path):
+                yield nixpkgs
+
 
-            with Chdir(nixpkgs_path):
-                yield setup_git(nixpkgs_path)
+def pytest_configure(config: pytest.Config) -> None:
+    # Look up nixpkgs once in the main process. pytest-xdist workers are
+    # started afterwards and inherit the result through the environment.
+    # Without workers, the first test that needs it looks it up instead.
+    if hasattr(config, "workerinput") or "TEST_NIXPKGS_PATH" in os.environ:
+        return
+    if not config.getoption("numprocesses", default=None):
+        return
+    with contextlib.suppress(OSError, subprocess.CalledProcessError):
+        os.environ["TEST_NIXPKGS_PATH"] = real_nixpkgs()
 
 
 @pytest.fixture
 def helpers() -> type[Helpers]:
     return Helpers
+
+
+@pytest.fixture
+def nixpkgs() -> Iterator[Nixpkgs]:
+    with Helpers.nixpkgs() as nixpkgs:
+        yield nixpkgs
+
+
+@pytest.fixture(autouse=True, scope="session")
+def _git_config(tmp_path_factory: pytest.TempPathFactory) -> Iterator[None]:
+    config = tmp_path_factory.mktemp("git").joinpath("config")
+    config.write_text(GIT_CONFIG)
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("GIT_CONFIG_GLOBAL", str(config))
+        mp.setenv("GIT_CONFIG_NOSYSTEM", "1")
+        yield
+
+
+@pytest.fixture(scope="module")
+def prepared_pr_repo() -> Iterator[Nixpkgs]:
+    # Pull request 1 changing pkg1. Reviews only add refs and cache
+    # directories, so the tests of a module can share one repository.
+    with Helpers.nixpkgs() as nixpkgs:
+        Helpers.git_commit_file(nixpkgs.path, "pkg1.txt", "foo", "example-change")
+        git(nixpkgs.path, "push", nixpkgs.remote, "HEAD:refs/heads/pull/1/merge")
+        yield nixpkgs
+
+
+@pytest.fixture(autouse=True)
+def _no_network(monkeypatch: pytest.MonkeyPatch) -> None:
+    # git and nix are run as real subprocesses by the integration tests, but
+    # nothing in the test process itself should ever talk to the network.
+    def blocked(*_args: object, **_kwargs: object) -> None:
+        msg = "network access in tests is not allowed, mock urllib.request.urlopen"
+        raise RuntimeError(msg)
+
+    monkeypatch.setattr(socket, "socket", blocked)
+    # name resolution happens before any socket is created
+    monkeypatch.setattr(socket, "getaddrinfo", blocked)
@@ -0,0 +1,113 @@
+import json
+import os
+import subprocess
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from nixpkgs_review.utils import (
+    CURRENT_SYSTEM_CACHE_MAX_AGE,
+    _compute_current_system,
+    current_system_cache_key,
+)
+
+
+@pytest.fixture
+def cache_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    monkeypatch.delenv("NIXPKGS_REVIEW_CURRENT_SYSTEM", raising=False)
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    monkeypatch.setenv("NIX_CONF_DIR", str(tmp_path.joinpath("etc")))
+    monkeypatch.setenv("NIX_USER_CONF_FILES", "")
+    return tmp_path.joinpath("nixpkgs-review")
+
+
+def nix_eval_result(system: str) -> subprocess.CompletedProcess[str]:
+    return subprocess.CompletedProcess(args=[], returncode=0, stdout=system)
+
+
+def write_cache(cache_dir: Path, key: list[str], system: str) -> Path:
+    cache_dir.mkdir(parents=True)
+    cache = cache_dir.joinpath("current_system")
+    cache.write_text(json.dumps({"key": key, "system": system}))
+    return cache
+
+
+@patch("nixpkgs_review.utils.subprocess.run")
+def test_override(mock_run: MagicMock, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("NIXPKGS_REVIEW_CURRENT_SYSTEM", "riscv64-linux")
+    assert _compute_current_system() == "riscv64-linux"
+    mock_run.assert_not_called()
+
+
+@patch("nixpkgs_review.utils.subprocess.run")
+def test_cache_hit(mock_run: MagicMock, cache_dir: Path) -> None:
+    write_cache(cache_dir, current_system_cache_key(), "aarch64-linux")
+    assert _compute_current_system() == "aarch64-linux"
+    mock_run.assert_not_called()
+
+
+@patch("nixpkgs_review.utils.subprocess.run")
+def test_cache_miss_writes_cache(mock_run: MagicMock, cache_dir: Path) -> None:
+    mock_run.return_value = nix_eval_result("x86_64-linux")
+    assert _compute_current_system() == "x86_64-linux"
+    cached = json.loads(cache_dir.joinpath("current_system").read_text())
+    assert cached == {"key": current_system_cache_key(), "system": "x86_64-linux"}
+
+
+@patch("nixpkgs_review.utils.subprocess.run")
+def test_stale_cache(mock_run: MagicMock, cache_dir: Path) -> None:
+    cache = write_cache(cache_dir, current_system_cache_key(), "aarch64-linux")
+    expired = cache.stat().st_mtime - CURRENT_SYSTEM_CACHE_MAX_AGE - 1
+    os.utime(cache, (expired, expired))
+    mock_run.return_value = nix_eval_result("x86_64-linux")
+    assert _compute_current_system() == "x86_64-linux"
+    mock_run.assert_called_once()
+
+
+@patch("nixpkgs_review.utils.subprocess.run")
+def test_cache_from_other_host(mock_run: MagicMock, cache_dir: Path) -> None:
+    write_cache(cache_dir, ["aarch64", "other-host"], "aarch64-linux")
+    mock_run.return_value = nix_eval_result("x86_64-linux")
+    assert _compute_current_system() == "x86_64-linux"
+    mock_run.assert_called_once()
+
+
+@patch("nixpkgs_review.utils.subprocess.run")
+def test_cache_after_nix_conf_change(
+    mock_run: MagicMock, cache_dir: Path, tmp_path: Path
+) -> None:
+    write_cache(cache_dir, current_system_cache_key(), "aarch64-linux")
+    nix_conf = tmp_path.joinpath("etc", "nix.conf")
+    nix_conf.parent.mkdir()
+    nix_conf.write_text("system = x86_64-linux\n")
+    mock_run.return_value = nix_eval_result("x86_64-linux")
+    assert _compute_current_system() == "x86_64-linux"
+    mock_run.assert_called_once()
+
+
+@patch("nixpkgs_review.utils.subprocess.run")
+def test_cache_write_failure(mock_run: MagicMock, cache_dir: Path) -> None:
+    # a file where the cache directory should be makes the write fail
+    cache_dir.write_text("")
+    mock_run.return_value = nix_eval_result("x86_64-linux")
+    assert _compute_current_system() == "x86_64-linux"
+
+
+@patch("nixpkgs_review.utils.subprocess.run")
+def test_cache_after_xdg_config_dirs_change(
+    mock_run: MagicMock,
+    cache_dir: Path,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.delenv("NIX_USER_CONF_FILES")
+    monkeypatch.setenv("XDG_CONFIG_DIRS", str(tmp_path.joinpath("xdg")))
+    monkeypatch.setenv("XDG_CONFIG_HOME", str(tmp_path.joinpath("config")))
+    write_cache(cache_dir, current_system_cache_key(), "aarch64-linux")
+    nix_conf = tmp_path.joinpath("xdg", "nix", "nix.conf")
+    nix_conf.parent.mkdir(parents=True)
+    nix_conf.write_text("system = x86_64-linux\n")
+    mock_run.return_value = nix_eval_result("x86_64-linux")
+    assert _compute_current_system() == "x86_64-linux"
+    mock_run.assert_called_once()
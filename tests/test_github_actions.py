@@ -1,38 +1,36 @@
-import os
-from unittest.mock import MagicMock, mock_open, patch
+import io
+from pathlib import Path
+from unittest.mock import MagicMock, patch
 
-from nixpkgs_review.cli import main
+import pytest
 
-from .conftest import Helpers
+from nixpkgs_review.cli import main
 
 
 @patch("urllib.request.urlopen")
-def test_post_result(mock_urlopen: MagicMock, helpers: Helpers) -> None:
-    with helpers.nixpkgs() as nixpkgs:
-        root = nixpkgs.path.parent
-
-        os.environ["PR"] = "1"
-        os.environ["GITHUB_TOKEN"] = "foo"  # noqa: S105
-        os.environ["NIXPKGS_REVIEW_ROOT"] = str(root)
-        mock_urlopen.side_effect = [mock_open(read_data="{}")()]
+def test_post_result(
+    mock_urlopen: MagicMock, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("PR", "1")
+    monkeypatch.setenv("GITHUB_TOKEN", "foo")
+    monkeypatch.setenv("NIXPKGS_REVIEW_ROOT", str(tmp_path))
+    mock_urlopen.side_effect = [io.BytesIO(b"{}")]
 
-        (root / "report.md").write_text("")
-        main("nixpkgs-review", ["post-result"])
+    (tmp_path / "report.md").touch()
+    main("nixpkgs-review", ["post-result"])
 
 
 @patch("urllib.request.urlopen")
-def test_merge(mock_urlopen: MagicMock, helpers: Helpers) -> None:
-    with helpers.save_environ():
-        os.environ["PR"] = "1"
-        os.environ["GITHUB_TOKEN"] = "foo"  # noqa: S105
-        mock_urlopen.side_effect = [mock_open(read_data="{}")()]
-        main("nixpkgs-review", ["merge"])
+def test_merge(mock_urlopen: MagicMock, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("PR", "1")
+    monkeypatch.setenv("GITHUB_TOKEN", "foo")
+    mock_urlopen.side_effect = [io.BytesIO(b"{}")]
+    main("nixpkgs-review", ["merge"])
 
 
 @patch("urllib.request.urlopen")
-def test_approve(mock_urlopen: MagicMock, helpers: Helpers) -> None:
-    with helpers.save_environ():
-        os.environ["PR"] = "1"
-        os.environ["GITHUB_TOKEN"] = "foo"  # noqa: S105
-        mock_urlopen.side_effect = [mock_open(read_data="{}")()]
-        main("nixpkgs-review", ["approve"])
+def test_approve(mock_urlopen: MagicMock, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("PR", "1")
+    monkeypatch.setenv("GITHUB_TOKEN", "foo")
+    mock_urlopen.side_effect = [io.BytesIO(b"{}")]
+    main("nixpkgs-review", ["approve"])
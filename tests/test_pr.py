@@ -1,9 +1,9 @@
 import io
-import shutil
-import subprocess
+import json
 import zipfile
+from collections.abc import Iterator
 from http.client import HTTPMessage
-from unittest.mock import MagicMock, Mock, mock_open, patch
+from unittest.mock import MagicMock, Mock, patch
 from urllib.error import HTTPError
 
 import pytest
@@ -11,7 +11,37 @@ import pytest
 from nixpkgs_review.cli import main
 from nixpkgs_review.utils import nix_nom_tool
 
-from .conftest import Helpers
+from .conftest import Helpers, Nixpkgs, git, requires_bwrap, requires_nom
+
+
+@pytest.fixture
+def local_eval_github() -> Iterator[MagicMock]:
+    # The pull request and an empty workflow run list, so the review always
+    # falls back to local evaluation without talking to GitHub.
+    pull_request = {"number": 1, "base": {"ref": "master"}, "head": {"sha": "0" * 40}}
+    with patch("urllib.request.urlopen") as mock_urlopen:
+        mock_urlopen.side_effect = [
+            io.BytesIO(json.dumps(pull_request).encode()),
+            io.BytesIO(b"{}"),
+        ]
+        yield mock_urlopen
+
+
+def comparison_zip() -> bytes:
+    # Create minimal fake zip archive that could have been generated by the `comparison` GH action.
+    # It is only read back, so skip compressing it.
+    mock_zip = io.BytesIO()
+    with zipfile.ZipFile(mock_zip, "w", zipfile.ZIP_STORED) as zf:
+        zf.writestr(
+            "changed-paths.json",
+            Helpers.read_asset(
+                "test_pr_github_action_eval/comparison-changed-paths.json"
+            ),
+        )
+    return mock_zip.getvalue()
+
+
+COMPARISON_ZIP = comparison_zip()
 
 
 @patch("nixpkgs_review.utils.shutil.which", return_value=None)
@@ -21,143 +51,131 @@ def test_default_to_nix_if_nom_not_found(mock_shutil: Mock) -> None:
     mock_shutil.assert_called_once()
 
 
-@pytest.mark.skipif(not shutil.which("nom"), reason="`nom` not found in PATH")
-def test_pr_local_eval(helpers: Helpers, capfd: pytest.CaptureFixture) -> None:
-    with helpers.nixpkgs() as nixpkgs:
-        nixpkgs.path.joinpath("pkg1.txt").write_text("foo")
-        subprocess.run(["git", "add", "."], check=True)
-        subprocess.run(["git", "commit", "-m", "example-change"], check=True)
-        subprocess.run(["git", "checkout", "-b", "pull/1/merge"], check=True)
-        subprocess.run(["git", "push", str(nixpkgs.remote), "pull/1/merge"], check=True)
-
-        path = main(
-            "nixpkgs-review",
-            [
-                "pr",
-                "--remote",
-                str(nixpkgs.remote),
-                "--run",
-                "exit 0",
-                "1",
-            ],
-        )
-        helpers.assert_built(pkg_name="pkg1", path=path)
-        captured = capfd.readouterr()
-        assert "$ nom build" in captured.out
-
-
+@pytest.mark.nix
+@pytest.mark.parametrize(
+    ("args", "build_command"),
+    [
+        pytest.param([], "$ nom build", marks=requires_nom, id="nom"),
+        pytest.param(["--build-graph", "nix"], "$ nix build", id="without-nom"),
+        pytest.param(
+            ["--sandbox"],
+            f"$ {nix_nom_tool()} build",
+            marks=requires_bwrap,
+            id="sandbox",
+        ),
+    ],
+)
+@pytest.mark.usefixtures("local_eval_github")
+def test_pr_local_eval(
+    args: list[str],
+    build_command: str,
+    prepared_pr_repo: Nixpkgs,
+    helpers: Helpers,
+    capfd: pytest.CaptureFixture,
+) -> None:
+    path = main(
+        "nixpkgs-review",
+        [
+            "pr",
+            "--remote",
+            str(prepared_pr_repo.remote),
+            "--run",
+            "exit 0",
+            "1",
+            *args,
+        ],
+    )
+    helpers.assert_built(pkg_name="pkg1", path=path)
+    captured = capfd.readouterr()
+    assert build_command in captured.out
+
+
+@pytest.mark.nix
+@pytest.mark.usefixtures("local_eval_github")
 @patch("nixpkgs_review.cli.nix_nom_tool", return_value="nix")
 def test_pr_local_eval_missing_nom(
-    mock_tool: Mock, helpers: Helpers, capfd: pytest.CaptureFixture
+    mock_tool: Mock,
+    prepared_pr_repo: Nixpkgs,
+    helpers: Helpers,
+    capfd: pytest.CaptureFixture,
 ) -> None:
-    with helpers.nixpkgs() as nixpkgs:
-        nixpkgs.path.joinpath("pkg1.txt").write_text("foo")
-        subprocess.run(["git", "add", "."], check=True)
-        subprocess.run(["git", "commit", "-m", "example-change"], check=True)
-        subprocess.run(["git", "checkout", "-b", "pull/1/merge"], check=True)
-        subprocess.run(["git", "push", str(nixpkgs.remote), "pull/1/merge"], check=True)
-
-        path = main(
-            "nixpkgs-review",
-            [
-                "pr",
-                "--remote",
-                str(nixpkgs.remote),
-                "--run",
-                "exit 0",
-                "1",
-            ],
-        )
-        helpers.assert_built(pkg_name="pkg1", path=path)
-        mock_tool.assert_called_once()
-        captured = capfd.readouterr()
-        assert "$ nix build" in captured.out
+    path = main(
+        "nixpkgs-review",
+        ["pr", "--remote", str(prepared_pr_repo.remote), "--run", "exit 0", "1"],
+    )
+    helpers.assert_built(pkg_name="pkg1", path=path)
+    mock_tool.assert_called_once()
+    captured = capfd.readouterr()
+    assert "$ nix build" in captured.out
 
 
-def test_pr_local_eval_without_nom(
-    helpers: Helpers, capfd: pytest.CaptureFixture
+@pytest.mark.nix
+@patch("urllib.request.urlopen")
+def test_pr_ofborg_eval(
+    mock_urlopen: MagicMock, nixpkgs: Nixpkgs, helpers: Helpers
 ) -> None:
-    with helpers.nixpkgs() as nixpkgs:
-        nixpkgs.path.joinpath("pkg1.txt").write_text("foo")
-        subprocess.run(["git", "add", "."], check=True)
-        subprocess.run(["git", "commit", "-m", "example-change"], check=True)
-        subprocess.run(["git", "checkout", "-b", "pull/1/merge"], check=True)
-        subprocess.run(["git", "push", str(nixpkgs.remote), "pull/1/merge"], check=True)
-
-        path = main(
-            "nixpkgs-review",
-            [
-                "pr",
-                "--remote",
-                str(nixpkgs.remote),
-                "--run",
-                "exit 0",
-                "1",
-                "--build-graph",
-                "nix",
-            ],
-        )
-        helpers.assert_built(pkg_name="pkg1", path=path)
-        captured = capfd.readouterr()
-        assert "$ nix build" in captured.out
-
-
-@pytest.mark.skipif(not shutil.which("bwrap"), reason="`bwrap` not found in PATH")
-def test_pr_local_eval_with_sandbox(helpers: Helpers) -> None:
-    with helpers.nixpkgs() as nixpkgs:
-        nixpkgs.path.joinpath("pkg1.txt").write_text("foo")
-        subprocess.run(["git", "add", "."], check=True)
-        subprocess.run(["git", "commit", "-m", "example-change"], check=True)
-        subprocess.run(["git", "checkout", "-b", "pull/1/merge"], check=True)
-        subprocess.run(["git", "push", str(nixpkgs.remote), "pull/1/merge"], check=True)
-
-        path = main(
-            "nixpkgs-review",
-            [
-                "pr",
-                "--sandbox",
-                "--remote",
-                str(nixpkgs.remote),
-                "--run",
-                "exit 0",
-                "1",
-            ],
-        )
-        helpers.assert_built(pkg_name="pkg1", path=path)
-
-
+    helpers.git_commit_file(nixpkgs.path, "pkg1.txt", "foo", "example-change")
+    git(nixpkgs.path, "push", nixpkgs.remote, "HEAD:refs/heads/pull/37200/merge")
+
+    mock_urlopen.side_effect = [
+        io.BytesIO(helpers.read_asset("test_pr_ofborg_eval/github-pull-37200.json")),
+        io.BytesIO(
+            helpers.read_asset("test_pr_ofborg_eval/github-workflows-37200.json")
+        ),
+    ]
+
+    path = main(
+        "nixpkgs-review",
+        [
+            "pr",
+            "--remote",
+            str(nixpkgs.remote),
+            "--run",
+            "exit 0",
+            "37200",
+        ],
+    )
+    helpers.assert_built(pkg_name="pkg1", path=path)
+
+
+@pytest.mark.nix
 @patch("urllib.request.urlopen")
-def test_pr_ofborg_eval(mock_urlopen: MagicMock, helpers: Helpers) -> None:
-    with helpers.nixpkgs() as nixpkgs:
-        nixpkgs.path.joinpath("pkg1.txt").write_text("foo")
-        subprocess.run(["git", "add", "."], check=True)
-        subprocess.run(["git", "commit", "-m", "example-change"], check=True)
-        subprocess.run(["git", "checkout", "-b", "pull/37200/merge"], check=True)
-        subprocess.run(
-            ["git", "push", str(nixpkgs.remote), "pull/37200/merge"], check=True
-        )
-
-        mock_urlopen.side_effect = [
-            mock_open(
-                read_data=helpers.read_asset(
-                    "test_pr_ofborg_eval/github-pull-37200.json"
-                )
-            )(),
-            mock_open(
-                read_data=helpers.read_asset(
-                    "test_pr_ofborg_eval/github-workflows-37200.json"
-                )
-            )(),
-            mock_open(
-                read_data=helpers.read_asset(
-                    "test_pr_ofborg_eval/github-pull-37200-statuses.json"
-                )
-            )(),
-            helpers.read_asset("test_pr_ofborg_eval/gist-37200.txt")
-            .encode("utf-8")
-            .split(b"\n"),
-        ]
-
+def test_pr_github_action_eval(
+    mock_urlopen: MagicMock,
+    nixpkgs: Nixpkgs,
+    helpers: Helpers,
+) -> None:
+    helpers.git_commit_file(nixpkgs.path, "pkg1.txt", "foo", "example-change")
+    git(nixpkgs.path, "push", nixpkgs.remote, "HEAD:refs/heads/pull/363128/merge")
+
+    mock_urlopen.side_effect = [
+        io.BytesIO(
+            helpers.read_asset("test_pr_github_action_eval/github-pull-363128.json")
+        ),
+        io.BytesIO(
+            helpers.read_asset(
+                "test_pr_github_action_eval/github-workflows-363128.json"
+            )
+        ),
+        io.BytesIO(
+            helpers.read_asset(
+                "test_pr_github_action_eval/github-artifacts-363128.json"
+            )
+        ),
+        io.BytesIO(COMPARISON_ZIP),
+    ]
+
+    hdrs = HTTPMessage()
+    hdrs.add_header("Location", "http://example.com")
+    http_error = HTTPError(
+        url="http://example.com",
+        code=302,
+        msg="Found",
+        hdrs=hdrs,
+        fp=None,
+    )
+
+    with patch("nixpkgs_review.github.no_redirect_opener.open", side_effect=http_error):
         path = main(
             "nixpkgs-review",
             [
@@ -166,78 +184,7 @@ def test_pr_ofborg_eval(mock_urlopen: MagicMock, helpers: Helpers) -> None:
                 str(nixpkgs.remote),
                 "--run",
                 "exit 0",
-                "37200",
+                "363128",
             ],
         )
         helpers.assert_built(pkg_name="pkg1", path=path)
-
-
-@patch("urllib.request.urlopen")
-def test_pr_github_action_eval(
-    mock_urlopen: MagicMock,
-    helpers: Helpers,
-) -> None:
-    with helpers.nixpkgs() as nixpkgs:
-        nixpkgs.path.joinpath("pkg1.txt").write_text("foo")
-        subprocess.run(["git", "add", "."], check=True)
-        subprocess.run(["git", "commit", "-m", "example-change"], check=True)
-        subprocess.run(["git", "checkout", "-b", "pull/363128/merge"], check=True)
-        subprocess.run(
-            ["git", "push", str(nixpkgs.remote), "pull/363128/merge"], check=True
-        )
-
-        # Create minimal fake zip archive that could have been generated by the `comparison` GH action.
-        mock_zip = io.BytesIO()
-        with zipfile.ZipFile(mock_zip, "w", zipfile.ZIP_DEFLATED) as zf:
-            zf.writestr(
-                "changed-paths.json",
-                helpers.read_asset(
-                    "test_pr_github_action_eval/comparison-changed-paths.json"
-                ),
-            )
-        mock_zip.seek(0)
-
-        mock_urlopen.side_effect = [
-            mock_open(
-                read_data=helpers.read_asset(
-                    "test_pr_github_action_eval/github-pull-363128.json"
-                )
-            )(),
-            mock_open(
-                read_data=helpers.read_asset(
-                    "test_pr_github_action_eval/github-workflows-363128.json"
-                )
-            )(),
-            mock_open(
-                read_data=helpers.read_asset(
-                    "test_pr_github_action_eval/github-artifacts-363128.json"
-                )
-            )(),
-            mock_open(read_data=mock_zip.getvalue())(),
-        ]
-
-        hdrs = HTTPMessage()
-        hdrs.add_header("Location", "http://example.com")
-        http_error = HTTPError(
-            url="http://example.com",
-            code=302,
-            msg="Found",
-            hdrs=hdrs,
-            fp=None,
-        )
-
-        with patch(
-            "nixpkgs_review.github.no_redirect_opener.open", side_effect=http_error
-        ):
-            path = main(
-                "nixpkgs-review",
-                [
-                    "pr",
-                    "--remote",
-                    str(nixpkgs.remote),
-                    "--run",
-                    "exit 0",
-                    "363128",
-                ],
-            )
-            helpers.assert_built(pkg_name="pkg1", path=path)
@@ -1,42 +1,31 @@
-import shutil
-import subprocess
-
 import pytest
 
 from nixpkgs_review.cli import main
 
-from .conftest import Helpers
-
+from .conftest import Helpers, Nixpkgs, requires_nom
 
-@pytest.mark.skipif(not shutil.which("nom"), reason="`nom` not found in PATH")
-def test_rev_command(helpers: Helpers) -> None:
-    with helpers.nixpkgs() as nixpkgs:
-        nixpkgs.path.joinpath("pkg1.txt").write_text("foo")
-        subprocess.run(["git", "add", "."], check=True)
-        subprocess.run(["git", "commit", "-m", "example-change"], check=True)
-        path = main(
-            "nixpkgs-review",
-            ["rev", "HEAD", "--remote", str(nixpkgs.remote), "--run", "exit 0"],
-        )
-        helpers.assert_built(pkg_name="pkg1", path=path)
+pytestmark = pytest.mark.nix
 
 
-def test_rev_command_without_nom(helpers: Helpers) -> None:
-    with helpers.nixpkgs() as nixpkgs:
-        nixpkgs.path.joinpath("pkg1.txt").write_text("foo")
-        subprocess.run(["git", "add", "."], check=True)
-        subprocess.run(["git", "commit", "-m", "example-change"], check=True)
-        path = main(
-            "nixpkgs-review",
-            [
-                "rev",
-                "HEAD",
-                "--remote",
-                str(nixpkgs.remote),
-                "--run",
-                "exit 0",
-                "--build-graph",
-                "nix",
-            ],
-        )
-        helpers.assert_built(pkg_name="pkg1", path=path)
+@pytest.mark.parametrize(
+    "build_args",
+    [
+        pytest.param([], marks=requires_nom, id="nom"),
+        pytest.param(["--build-graph", "nix"], id="without-nom"),
+    ],
+)
+def test_rev_command(build_args: list[str], nixpkgs: Nixpkgs, helpers: Helpers) -> None:
+    helpers.git_commit_file(nixpkgs.path, "pkg1.txt", "foo", "example-change")
+    path = main(
+        "nixpkgs-review",
+        [
+            "rev",
+            "HEAD",
+            "--remote",
+            str(nixpkgs.remote),
+            "--run",
+            "exit 0",
+            *build_args,
+        ],
+    )
+    helpers.assert_built(pkg_name="pkg1", path=path)
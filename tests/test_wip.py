@@ -1,42 +1,31 @@
-import shutil
-
 import pytest
 
 from nixpkgs_review.cli import main
 
-from .conftest import Helpers
-
+from .conftest import Helpers, Nixpkgs, requires_nom
 
-@pytest.mark.skipif(not shutil.which("nom"), reason="`nom` not found in PATH")
-def test_wip_command(helpers: Helpers, capfd: pytest.CaptureFixture) -> None:
-    with helpers.nixpkgs() as nixpkgs:
-        nixpkgs.path.joinpath("pkg1.txt").write_text("foo")
-        path = main(
-            "nixpkgs-review",
-            ["wip", "--remote", str(nixpkgs.remote), "--run", "exit 0"],
-        )
-        helpers.assert_built(pkg_name="pkg1", path=path)
-        captured = capfd.readouterr()
-        assert "$ nom build" in captured.out
+pytestmark = pytest.mark.nix
 
 
-def test_wip_command_without_nom(
-    helpers: Helpers, capfd: pytest.CaptureFixture
+@pytest.mark.parametrize(
+    ("build_args", "build_command"),
+    [
+        pytest.param([], "$ nom build", marks=requires_nom, id="nom"),
+        pytest.param(["--build-graph", "nix"], "$ nix build", id="without-nom"),
+    ],
+)
+def test_wip_command(
+    build_args: list[str],
+    build_command: str,
+    nixpkgs: Nixpkgs,
+    helpers: Helpers,
+    capfd: pytest.CaptureFixture,
 ) -> None:
-    with helpers.nixpkgs() as nixpkgs:
-        nixpkgs.path.joinpath("pkg1.txt").write_text("foo")
-        path = main(
-            "nixpkgs-review",
-            [
-                "wip",
-                "--remote",
-                str(nixpkgs.remote),
-                "--run",
-                "exit 0",
-                "--build-graph",
-                "nix",
-            ],
-        )
-        helpers.assert_built(pkg_name="pkg1", path=path)
-        captured = capfd.readouterr()
-        assert "$ nix build" in captured.out
+    nixpkgs.path.joinpath("pkg1.txt").write_text("foo")
+    path = main(
+        "nixpkgs-review",
+        ["wip", "--remote", str(nixpkgs.remote), "--run", "exit 0", *build_args],
+    )
+    helpers.assert_built(pkg_name="pkg1", path=path)
+    captured = capfd.readouterr()
+    assert build_command in captured.out